@@ -26,9 +26,20 @@ The is_ibm_hardware flag controls which execution path is used in qaoa.py
 (SamplerV2 + Session for IBM vs AerSimulator.run() for local).
 """
 
+import hashlib
+import time
 from dataclasses import dataclass
 from typing import Optional
 
+# Successful IBM hardware selections, keyed by (API-key digest, stock_count).
+# Authenticating with QiskitRuntimeService and querying least_busy costs a
+# network round trip to IBM on every /optimize call; repeated requests from
+# the same user within the TTL reuse the previously chosen device. The TTL is
+# short so queue-depth changes still rotate the device choice. Only the key's
+# digest is stored — never the key itself.
+_IBM_BACKEND_CACHE: dict = {}
+_IBM_BACKEND_TTL = 60.0  # seconds
+
 
 @dataclass
 class BackendConfig:
@@ -89,13 +100,27 @@ def get_backend(
 
     # --- Rule 3: Attempt real IBM Quantum hardware ---
     if ibm_api_key and ibm_api_key.strip():
+        token = ibm_api_key.strip()
+
+        # Fresh-enough cached selection for this key and portfolio size?
+        cache_key = (hashlib.sha256(token.encode()).hexdigest()[:16], stock_count)
+        cached = _IBM_BACKEND_CACHE.get(cache_key)
+        if cached is not None and time.monotonic() - cached[0] < _IBM_BACKEND_TTL:
+            backend = cached[1]
+            return BackendConfig(
+                backend=backend,
+                backend_name=backend.name,
+                used_simulator_fallback=False,
+                is_ibm_hardware=True,
+            )
+
         try:
             from qiskit_ibm_runtime import QiskitRuntimeService
 
             # Authenticate with IBM Quantum Network
             service = QiskitRuntimeService(
                 channel="ibm_quantum",
-                token=ibm_api_key.strip(),
+                token=token,
             )
 
             # Select the least-busy operational device with enough qubits.
@@ -107,6 +132,8 @@ def get_backend(
                 min_num_qubits=stock_count * 2,
             )
 
+            _IBM_BACKEND_CACHE[cache_key] = (time.monotonic(), backend)
+
             return BackendConfig(
                 backend=backend,
                 backend_name=backend.name,
@@ -0,0 +1,154 @@
+"""
+On-disk price cache for yfinance downloads.
+
+Yahoo Finance round trips dominate request latency: the same (ticker, window)
+is re-downloaded on every call even though daily closes for a fixed window
+never change. Each ticker's close series is persisted as a parquet file keyed
+by (ticker, start, end); repeated requests become local reads and only the
+cache misses go to the network — in a single batched download.
+
+The window end date is pinned to the current day by the caller, so cache keys
+roll over naturally at the day boundary and no explicit TTL is needed. All
+disk operations are best-effort: a read-only filesystem or a missing parquet
+engine silently degrades to plain downloads. A small in-process cache on top
+makes repeated identical requests within one server process free.
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+import yfinance as yf
+
+# pyarrow is an optional dependency (pandas may be backed by fastparquet
+# instead): when present, cache files are opened memory-mapped so the OS page
+# cache serves repeat reads without a read-time copy into fresh buffers.
+try:
+    import pyarrow.parquet as pq
+    _HAS_PYARROW = True
+except ImportError:
+    _HAS_PYARROW = False
+
+# Cache directory — overridable for tests/deployments without a home dir
+_CACHE_DIR = Path(os.environ.get("QPO_CACHE_DIR", str(Path.home() / ".cache" / "qpo")))
+
+# One HTTP session shared by every Yahoo call in the process, so the TLS
+# handshake and cookie/crumb exchange are paid once instead of per download.
+# curl_cffi's browser-impersonating session (what yfinance itself recommends
+# against rate limiting) is preferred when installed; plain requests otherwise.
+try:
+    from curl_cffi import requests as _curl_requests
+    YF_SESSION = _curl_requests.Session(impersonate="chrome")
+except ImportError:
+    import requests
+    YF_SESSION = requests.Session()
+
+# In-process layer: assembled close DataFrames keyed by (tickers, start, end).
+# Bounded, insertion-ordered eviction — same pattern as the QUBO cache.
+_MEMORY_CACHE: Dict[tuple, pd.DataFrame] = {}
+_MEMORY_CACHE_MAX = 8
+
+
+def _cache_path(ticker: str, start: str, end: str) -> Path:
+    return _CACHE_DIR / f"{ticker}_{start}_{end}.parquet"
+
+
+def _read_cached(ticker: str, start: str, end: str) -> Optional[pd.Series]:
+    """Load one ticker's cached close series, or None on miss/any error."""
+    path = _cache_path(ticker, start, end)
+    if not path.exists():
+        return None
+    try:
+        if _HAS_PYARROW:
+            # Memory-mapped read: arrow buffers point into the page cache
+            return pq.read_table(path, memory_map=True).to_pandas()[ticker]
+        return pd.read_parquet(path)[ticker]
+    except Exception:
+        # Corrupt file, schema change, missing parquet engine — treat as a miss
+        return None
+
+
+def _write_cached(ticker: str, start: str, end: str, series: pd.Series) -> None:
+    """Persist one ticker's close series. Failures are silently ignored."""
+    try:
+        _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        series.to_frame(name=ticker).to_parquet(_cache_path(ticker, start, end))
+    except Exception:
+        pass
+
+
+def _download_close(tickers: List[str], start: str, end: str) -> pd.DataFrame:
+    """One batched yfinance download, reduced to the close-price DataFrame."""
+    raw = yf.download(
+        tickers,
+        start=start,
+        end=end,
+        auto_adjust=True,   # adjusts for splits and dividends automatically
+        progress=False,     # suppress the tqdm progress bar in server logs
+        session=YF_SESSION,
+    )
+    if raw.empty:
+        return pd.DataFrame()
+
+    # yfinance 1.x returns MultiIndex columns: (Price, Ticker)
+    close = raw["Close"]
+    if isinstance(close, pd.Series):
+        close = close.to_frame(name=tickers[0])
+    return close
+
+
+def fetch_close_prices(tickers: List[str], start: str, end: str) -> pd.DataFrame:
+    """
+    Close prices for the requested tickers and window, cache-first.
+
+    Per ticker: in-process cache → parquet file → batched network download.
+    Tickers Yahoo doesn't recognize are simply absent from the returned
+    columns (mirroring yf.download), and are never cached.
+
+    Args:
+        tickers: Ticker symbols in the user's requested order
+        start:   Window start, "YYYY-MM-DD"
+        end:     Window end, "YYYY-MM-DD"
+
+    Returns:
+        DataFrame(index=date, columns=found tickers). May be empty.
+    """
+    # Order-insensitive key: ["MSFT","AAPL"] and ["AAPL","MSFT"] hit the same
+    # entry (callers don't depend on column order; the disk layer is
+    # per-ticker and order-agnostic anyway)
+    key = (tuple(sorted(set(tickers))), start, end)
+    cached = _MEMORY_CACHE.get(key)
+    if cached is not None:
+        return cached.copy()
+
+    series: Dict[str, pd.Series] = {}
+    missing: List[str] = []
+    for t in tickers:
+        s = _read_cached(t, start, end)
+        if s is not None:
+            series[t] = s
+        else:
+            missing.append(t)
+
+    if missing:
+        fresh = _download_close(missing, start, end)
+        for t in missing:
+            # Only cache tickers with actual data — an all-NaN column means
+            # Yahoo doesn't know the symbol, and that verdict shouldn't stick
+            if t in fresh.columns and fresh[t].notna().any():
+                series[t] = fresh[t]
+                _write_cached(t, start, end, fresh[t])
+
+    if not series:
+        return pd.DataFrame()
+
+    # Outer-join on dates (NaN where a ticker has no quote) — the same shape
+    # a single batched download produces. Preserve the requested order.
+    close = pd.concat([series[t].rename(t) for t in tickers if t in series], axis=1)
+
+    if len(_MEMORY_CACHE) >= _MEMORY_CACHE_MAX:
+        _MEMORY_CACHE.pop(next(iter(_MEMORY_CACHE)))
+    _MEMORY_CACHE[key] = close
+
+    return close.copy()
@@ -18,18 +18,148 @@ prices via raw["Close"] which gives a DataFrame with one column per ticker.
 For a single ticker, this returns a Series — we convert it to a 1-column DataFrame.
 """
 
+import functools
+import threading
 import numpy as np
 import pandas as pd
 import yfinance as yf
-from datetime import datetime, timedelta
+from datetime import date, timedelta
 from typing import List, Tuple
 from dataclasses import dataclass, field
 from fastapi import HTTPException
 
+from finance._price_cache import YF_SESSION, fetch_close_prices
+
 # Minimum number of trading days required for a ticker to be included.
 # Tickers with fewer days are dropped rather than causing the request to fail.
 MIN_DAYS = 30
 
+# Bottleneck is an optional dependency: its compiled push() forward-fills a
+# float ndarray ~3x faster than pandas' block-wise ffill. Without it, the
+# pandas path below is used.
+try:
+    import bottleneck as bn
+    _HAS_BOTTLENECK = True
+except ImportError:
+    _HAS_BOTTLENECK = False
+
+# Numba is a second optional path for the forward-fill: a JIT-compiled
+# per-column kernel with the branchless-friendly v == v NaN test. Used when
+# bottleneck isn't installed (bottleneck wins the tie because it carries no
+# first-call compilation latency).
+try:
+    from numba import njit, prange
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _returns_mean_cov_numba(prices: np.ndarray):
+        """
+        Fused daily returns, column means and daily covariance (ddof=1).
+
+        One pass computes the returns and their sums, a second the covariance
+        upper triangle centered on the fly — no centered-copy allocation and
+        no pandas/BLAS dispatch, which wins for the small (n <= ~50) universes
+        this service optimizes.
+        """
+        T, N = prices.shape
+        ret = np.empty((T - 1, N), dtype=np.float32)
+        mu = np.empty(N)
+        for j in prange(N):
+            s = 0.0
+            for t in range(T - 1):
+                r = prices[t + 1, j] / prices[t, j] - 1.0
+                ret[t, j] = r
+                s += r
+            mu[j] = s / (T - 1)
+        cov = np.empty((N, N))
+        for i in prange(N):
+            for j in range(i, N):
+                acc = 0.0
+                for t in range(T - 1):
+                    acc += (ret[t, i] - mu[i]) * (ret[t, j] - mu[j])
+                c = acc / (T - 2)
+                cov[i, j] = c
+                cov[j, i] = c
+        return ret, mu, cov
+
+    @njit(parallel=True, cache=True)
+    def _ffill_numba(a: np.ndarray, n: int) -> np.ndarray:
+        """Forward-fill NaN runs of length <= n, in place, column-parallel."""
+        T, C = a.shape
+        for c in prange(C):
+            last = np.nan
+            run = 0
+            for t in range(T):
+                v = a[t, c]
+                if v == v:  # not NaN
+                    last = v
+                    run = 0
+                else:
+                    run += 1
+                    if run <= n and last == last:
+                        a[t, c] = last
+        return a
+
+    _HAS_NUMBA = True
+except ImportError:
+    _HAS_NUMBA = False
+
+
+def _ffill_values(arr: np.ndarray, limit: int = None) -> np.ndarray:
+    """
+    Forward-fill a float64 price array (limit=None fills without bound).
+
+    Dispatches to bottleneck's compiled push() or the numba kernel when
+    available. The numba path fills in place, so callers must pass an array
+    they own.
+    """
+    if _HAS_BOTTLENECK:
+        return bn.push(arr, n=limit, axis=0)
+    if _HAS_NUMBA:
+        return _ffill_numba(arr, limit if limit is not None else arr.shape[0])
+    return pd.DataFrame(arr).ffill(limit=limit).values
+
+
+def _ffill(close: pd.DataFrame, limit: int = None) -> pd.DataFrame:
+    """Forward-fill a price DataFrame via _ffill_values, rewrapping without copy."""
+    filled = _ffill_values(close.values.astype(np.float64), limit)
+    return pd.DataFrame(filled, index=close.index, columns=close.columns, copy=False)
+
+
+@functools.lru_cache(maxsize=4)
+def _window_strings(today: date, days: int) -> Tuple[str, str]:
+    """Format the (start, end) date strings for a lookback window once per day."""
+    return (today - timedelta(days=days)).isoformat(), today.isoformat()
+
+
+def _current_window(days: int) -> Tuple[str, str]:
+    """
+    (start, end) date strings for a lookback window ending today.
+
+    Keyed on the calendar day rather than wall time, so every request within
+    the same day produces identical strings — which also makes the price-cache
+    keys stable across a whole trading day instead of varying per call.
+    """
+    return _window_strings(date.today(), days)
+
+
+# Fully assembled StockData keyed by (tickers, window). The price cache
+# already removes the network hop for repeat requests, but the assembly
+# (gap fill, quality filter, returns, covariance) still reran; for identical
+# baskets on the same day the whole result is reusable. Callers treat
+# StockData as read-only, so the cached instance is shared. Bounded with
+# insertion-ordered eviction, same pattern as the in-process price cache.
+_STOCK_DATA_CACHE: dict = {}
+_STOCK_DATA_CACHE_MAX = 8
+_STOCK_DATA_CACHE_LOCK = threading.Lock()
+
+# validate_tickers verdicts, keyed by (tickers, window end). The frontend
+# calls the endpoint on every debounced keystroke, so the same prefixes
+# repeat constantly; whether Yahoo knows a symbol doesn't change within a
+# day (the day-keyed window rolls the cache over naturally).
+_VALIDATE_CACHE: dict = {}
+_VALIDATE_CACHE_MAX = 256
+_VALIDATE_CACHE_LOCK = threading.Lock()
+
 
 @dataclass
 class StockData:
@@ -37,9 +167,53 @@ class StockData:
     tickers: List[str]           # Tickers that survived the data quality filter
     mean_returns: np.ndarray     # Annualized expected return per ticker (shape: n,)
     cov_matrix: np.ndarray       # Annualized covariance matrix (shape: n x n)
-    correlation_matrix: np.ndarray  # Pearson correlation matrix (shape: n x n) — for the heatmap
-    daily_returns: pd.DataFrame  # Daily % returns DataFrame — used for backtesting
+    returns: np.ndarray          # Daily % returns, (T x n) float32 — the backtest hot path
+    dates: pd.DatetimeIndex      # Date axis parallel to the rows of `returns`
     dropped_tickers: List[str] = field(default_factory=list)  # Tickers removed due to insufficient data
+    _returns_df: pd.DataFrame = field(default=None, init=False, repr=False)
+    _corr: np.ndarray = field(default=None, init=False, repr=False)
+    _vols: np.ndarray = field(default=None, init=False, repr=False)
+
+    @property
+    def volatilities(self) -> np.ndarray:
+        """
+        Annualized per-asset volatility, √diag(Σ) (shape: n,) — lazy, cached.
+
+        Computed once and shared by every consumer that needs marginal risk
+        (the correlation normalization below, scoring heuristics) instead of
+        re-deriving diag + sqrt at each site.
+        """
+        if self._vols is None:
+            self._vols = np.sqrt(np.diag(self.cov_matrix))
+        return self._vols
+
+    @property
+    def correlation_matrix(self) -> np.ndarray:
+        """
+        Pearson correlation matrix (n x n) — for the heatmap.
+
+        Derived lazily from cov_matrix (the annualization factors cancel in
+        the normalization), so consumers that never render the heatmap skip
+        the O(n²) construction entirely.
+        """
+        if self._corr is None:
+            std = self.volatilities
+            self._corr = self.cov_matrix / np.outer(std, std)
+        return self._corr
+
+    @property
+    def daily_returns(self) -> pd.DataFrame:
+        """
+        DataFrame view over (returns, dates) — built lazily and cached.
+
+        Numeric consumers should read the plain arrays directly; this exists
+        for callers that genuinely need pandas (labelled indexing, resampling).
+        """
+        if self._returns_df is None:
+            self._returns_df = pd.DataFrame(
+                self.returns, index=self.dates, columns=self.tickers, copy=False
+            )
+        return self._returns_df
 
 
 def fetch_stock_data(tickers: List[str]) -> StockData:
@@ -60,52 +234,55 @@ def fetch_stock_data(tickers: List[str]) -> StockData:
         HTTPException 422: If no price data is returned, or if tickers are invalid,
                            or if too few tickers survive the data quality filter.
     """
-    end = datetime.today()
-    start = end - timedelta(days=2 * 365)  # 2-year lookback window
+    # Dedupe while preserving the user's order — duplicates would repeat the
+    # download/statistics work and produce singular covariance columns
+    tickers = list(dict.fromkeys(tickers))
 
-    # Download all tickers in a single batch request (faster than individual calls)
-    raw = yf.download(
-        tickers,
-        start=start.strftime("%Y-%m-%d"),
-        end=end.strftime("%Y-%m-%d"),
-        auto_adjust=True,   # adjusts for splits and dividends automatically
-        progress=False,     # suppress the tqdm progress bar in server logs
-    )
+    start_str, end_str = _current_window(2 * 365)  # 2-year lookback window
 
-    if raw.empty:
-        raise HTTPException(status_code=422, detail="No price data returned. Check tickers.")
+    # Same basket, same day → same StockData; skip the whole assembly
+    cache_key = (tuple(tickers), start_str, end_str)
+    with _STOCK_DATA_CACHE_LOCK:
+        cached = _STOCK_DATA_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
 
-    # yfinance 1.x always returns MultiIndex columns: (Price, Ticker)
-    # raw["Close"] extracts just the closing prices → DataFrame(index=date, columns=tickers)
-    close = raw["Close"]
+    # Cache-first close prices: previously seen tickers come off disk, only
+    # the misses hit Yahoo — in a single batch request
+    close = fetch_close_prices(tickers, start_str, end_str)
 
-    # Single-ticker edge case: yfinance returns a Series instead of DataFrame
-    if isinstance(close, pd.Series):
-        close = close.to_frame(name=tickers[0])
+    if close.empty:
+        raise HTTPException(status_code=422, detail="No price data returned. Check tickers.")
 
-    # Identify any tickers that yfinance couldn't find at all (invalid symbols)
-    available = [t for t in tickers if t in close.columns]
-    truly_missing = [t for t in tickers if t not in close.columns]
+    # Identify any tickers that yfinance couldn't find at all (invalid symbols).
+    # One frozenset instead of repeated pandas Index lookups per ticker.
+    col_set = frozenset(close.columns)
+    available = [t for t in tickers if t in col_set]
+    truly_missing = [t for t in tickers if t not in col_set]
     if truly_missing:
         raise HTTPException(
             status_code=422,
             detail=f"Invalid or unavailable tickers: {', '.join(truly_missing)}",
         )
 
-    # Preserve the user's original ticker ordering
-    close = close[available]
+    # Column order doesn't matter for the fill and sufficiency steps below, so
+    # the frame isn't sliced here — one reindex after the quality filter both
+    # selects the surviving tickers and restores the user's ordering, saving
+    # an intermediate DataFrame allocation.
 
     # --- Gap handling ---
     # Forward-fill up to 5 consecutive NaN days.
     # This handles: trading halts, exchange holidays, occasional data feed gaps.
     # Limit of 5 prevents filling weeks-long data outages (which indicate real problems).
-    close = close.ffill(limit=5)
+    close = _ffill(close, limit=5)
 
     # --- Per-ticker data sufficiency check ---
     # Count non-NaN rows per ticker. Tickers with too few data points (e.g. recent IPOs)
     # are dropped individually rather than failing the whole request.
-    counts = close.notna().sum()
-    dropped = counts[counts < MIN_DAYS].index.tolist()
+    # Counted straight off the ndarray — skips the boolean DataFrame that
+    # notna() allocates and the Series-backed reduction.
+    valid_counts = np.count_nonzero(~np.isnan(close.values), axis=0)
+    dropped = [t for t, c in zip(close.columns, valid_counts) if c < MIN_DAYS]
     valid_tickers = [t for t in available if t not in dropped]
 
     # Need at least 2 stocks to form a portfolio
@@ -120,14 +297,22 @@ def fetch_stock_data(tickers: List[str]) -> StockData:
             ),
         )
 
-    close = close[valid_tickers]
-
-    # Drop date rows where ALL valid tickers are missing (e.g. market holidays)
-    close = close.dropna(how="all")
-
-    # Fill any remaining gaps then drop rows still missing any value.
-    # After the per-ticker filter, remaining NaNs are isolated and safe to fill.
-    close = close.ffill().dropna()
+    # Single column selection: surviving tickers, in the user's request order
+    close = close.reindex(columns=valid_tickers, copy=False)
+
+    # --- Fused NaN cleanup, one pass over the raw ndarray ---
+    # Replaces dropna(how="all") + ffill() + dropna(): drop rows where every
+    # ticker is missing (market holidays), forward-fill the remaining isolated
+    # gaps (safe after the per-ticker filter), keep only complete rows — and
+    # rebuild the DataFrame once at the end instead of materializing three.
+    arr = close.values.astype(np.float64)  # owned copy — filled in place below
+    index = close.index
+    keep = ~np.isnan(arr).all(axis=1)
+    arr, index = arr[keep], index[keep]
+    arr = _ffill_values(arr)
+    complete = ~np.isnan(arr).any(axis=1)
+    arr, index = arr[complete], index[complete]
+    close = pd.DataFrame(arr, index=index, columns=close.columns, copy=False)
 
     # Final sanity check: ensure there are enough overlapping trading days
     if len(close) < MIN_DAYS:
@@ -137,27 +322,56 @@ def fetch_stock_data(tickers: List[str]) -> StockData:
         )
 
     # --- Return computation ---
-    # pct_change() computes (price_t - price_{t-1}) / price_{t-1} — the daily return
-    daily_returns = close.pct_change().dropna()
-
-    # Annualize: multiply daily mean by 252 trading days/year
-    # For covariance: variance scales with time, so multiply daily cov by 252
-    trading_days = 252
-    mean_returns = daily_returns.mean().values * trading_days
-    cov_matrix = daily_returns.cov().values * trading_days
-
-    # Pearson correlation is already scale-invariant (no annualization needed)
-    correlation_matrix = daily_returns.corr().values
-
-    return StockData(
+    # Daily return: (price_t - price_{t-1}) / price_{t-1}. The price matrix is
+    # dense at this point (post the fused cleanup), so compute directly on the
+    # ndarray — same FLOPs as pct_change() without pandas' NaN-aware dispatch
+    # or the leading all-NaN row it allocates just for dropna() to remove.
+    # float32 is plenty for quoted prices (~6 significant digits from Yahoo);
+    # accumulation-sensitive statistics stay double-precision in both paths.
+    trading_days = 252  # annualization: mean and variance both scale with time
+
+    if _HAS_NUMBA and arr.shape[1] <= 50:
+        # Small universes are dispatch-bound, not FLOP-bound: the fused kernel
+        # does returns + mean + covariance in one compiled sweep over `arr`
+        # (the dense float64 buffer the DataFrame above wraps)
+        returns_arr, mu, cov_daily = _returns_mean_cov_numba(arr)
+    else:
+        prices = np.ascontiguousarray(close.values, dtype=np.float32)
+        returns_arr = prices[1:] / prices[:-1] - 1.0
+
+        # One traversal for the mean — it both annualizes into mean_returns
+        # and centers the matrix for the covariance GEMM
+        mu = returns_arr.mean(axis=0, dtype=np.float64)
+
+        # Covariance via a single BLAS GEMM on the centered returns matrix
+        # (ddof=1, matching pandas .cov()): X^T X dispatches straight to
+        # dgemm. The centering runs at float32 bandwidth; only the GEMM
+        # operand is upcast so the covariance accumulates in double precision.
+        Rc = (returns_arr - mu.astype(np.float32)).astype(np.float64)
+        cov_daily = (Rc.T @ Rc) / (Rc.shape[0] - 1)
+
+    mean_returns = mu * trading_days
+    cov_matrix = cov_daily * trading_days
+
+    # Correlation is NOT computed here: StockData derives it lazily from the
+    # covariance (scale-invariant, so annualization doesn't matter)
+
+    result = StockData(
         tickers=valid_tickers,
         mean_returns=mean_returns,
         cov_matrix=cov_matrix,
-        correlation_matrix=correlation_matrix,
-        daily_returns=daily_returns,
+        returns=returns_arr,
+        dates=close.index[1:],
         dropped_tickers=dropped,
     )
 
+    with _STOCK_DATA_CACHE_LOCK:
+        if len(_STOCK_DATA_CACHE) >= _STOCK_DATA_CACHE_MAX:
+            _STOCK_DATA_CACHE.pop(next(iter(_STOCK_DATA_CACHE)))
+        _STOCK_DATA_CACHE[cache_key] = result
+
+    return result
+
 
 def validate_tickers(tickers: List[str]) -> dict:
     """
@@ -174,15 +388,24 @@ def validate_tickers(tickers: List[str]) -> dict:
     Returns:
         {"valid": [...], "invalid": [...]}
     """
-    end = datetime.today()
-    start = end - timedelta(days=10)  # short window — just enough to confirm existence
+    # Dedupe while preserving order — repeated symbols add no information
+    tickers = list(dict.fromkeys(tickers))
+
+    start_str, end_str = _current_window(10)  # short window — just enough to confirm existence
+
+    cache_key = (tuple(tickers), end_str)
+    with _VALIDATE_CACHE_LOCK:
+        cached = _VALIDATE_CACHE.get(cache_key)
+    if cached is not None:
+        return {"valid": list(cached["valid"]), "invalid": list(cached["invalid"])}
 
     raw = yf.download(
         tickers,
-        start=start.strftime("%Y-%m-%d"),
-        end=end.strftime("%Y-%m-%d"),
+        start=start_str,
+        end=end_str,
         auto_adjust=True,
         progress=False,
+        session=YF_SESSION,  # shared session — TLS/cookie setup paid once per process
     )
 
     if raw.empty:
@@ -193,7 +416,14 @@ def validate_tickers(tickers: List[str]) -> dict:
         close = close.to_frame(name=tickers[0])
 
     # A ticker is valid if it appears in the returned columns and has at least 2 data points
-    valid = [t for t in tickers if t in close.columns and close[t].dropna().shape[0] >= 2]
-    invalid = [t for t in tickers if t not in valid]
-
-    return {"valid": valid, "invalid": invalid}
+    col_set = frozenset(close.columns)
+    valid = [t for t in tickers if t in col_set and close[t].dropna().shape[0] >= 2]
+    valid_set = frozenset(valid)
+    invalid = [t for t in tickers if t not in valid_set]
+
+    result = {"valid": valid, "invalid": invalid}
+    with _VALIDATE_CACHE_LOCK:
+        if len(_VALIDATE_CACHE) >= _VALIDATE_CACHE_MAX:
+            _VALIDATE_CACHE.pop(next(iter(_VALIDATE_CACHE)))
+        _VALIDATE_CACHE[cache_key] = result
+    return result
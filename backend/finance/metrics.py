@@ -19,21 +19,102 @@ Important caveat: this is an IN-SAMPLE backtest — the optimization was done on
 the same data period. It measures fit, not forward-looking predictive power.
 """
 
+import threading
+import time
 import numpy as np
 import pandas as pd
-import yfinance as yf
 from datetime import datetime, timedelta
 from typing import List
 
+from finance._price_cache import fetch_close_prices
+
+# Optional numba acceleration for the backtest. The cumulative-return chains
+# are memory-bound: the numpy path allocates a temporary per operation (two
+# matmuls, three 1+x, three cumprods, three rescales), while the fused kernel
+# makes a single pass over the returns matrix writing straight into the three
+# output buffers. Falls back to the numpy expressions when numba is absent.
+try:
+    from numba import njit
+    _HAS_NUMBA = True
+
+    @njit(cache=True, fastmath=True)
+    def _portfolio_stats(w, mu, C, rf):
+        """Return, volatility and Sharpe of one portfolio in a single pass.
+
+        At n ≤ 50 the numpy dispatch overhead of the dot/matvec pair rivals
+        the arithmetic itself; the fused loops skip it entirely.
+        """
+        n = w.shape[0]
+        ret = 0.0
+        var = 0.0
+        for i in range(n):
+            ret += w[i] * mu[i]
+            row = 0.0
+            for j in range(n):
+                row += C[i, j] * w[j]
+            var += w[i] * row
+        vol = np.sqrt(var)
+        sharpe = (ret - rf) / vol if vol > 1e-9 else 0.0
+        return ret, vol, sharpe
+
+    @njit(cache=True, fastmath=True)
+    def _backtest_kernel(R, w1, w2, r_spy):
+        """Fused cumulative % return series for two portfolios and SPY."""
+        T, n = R.shape
+        out1 = np.empty(T)
+        out2 = np.empty(T)
+        out3 = np.empty(T)
+        # Compound in log space: acc = Σ log1p(r_t), then expm1(acc) recovers
+        # the growth factor minus one. Mathematically identical to the cumprod
+        # form but keeps its precision over long series of small returns.
+        acc1 = 0.0
+        acc2 = 0.0
+        acc3 = 0.0
+        for t in range(T):
+            rp1 = 0.0
+            rp2 = 0.0
+            for j in range(n):
+                rp1 += R[t, j] * w1[j]
+                rp2 += R[t, j] * w2[j]
+            acc1 += np.log1p(rp1)
+            acc2 += np.log1p(rp2)
+            acc3 += np.log1p(r_spy[t])
+            out1[t] = np.expm1(acc1) * 100.0
+            out2[t] = np.expm1(acc2) * 100.0
+            out3[t] = np.expm1(acc3) * 100.0
+        return out1, out2, out3
+
+except ImportError:
+    _HAS_NUMBA = False
+
 # Annual risk-free rate used in Sharpe ratio calculation.
 # Approximates the US 3-month Treasury bill yield.
 RISK_FREE_RATE = 0.05
 
+# SPY return series keyed by day-rounded (start, end). The benchmark and the
+# backtest both need SPY, and /optimize calls them on every request — without
+# a cache that's a Yahoo round trip each time for data that changes once a
+# day. Stale-by-hours is fine for a benchmark, hence the 6h TTL. Failures
+# (empty series) are never cached so transient network errors retry.
+_SPY_CACHE: dict = {}
+_SPY_CACHE_TTL = 6 * 60 * 60  # seconds
+_SPY_CACHE_LOCK = threading.Lock()
+
+# The finished benchmark dict, cached for an hour on top of the series cache:
+# the window end is pinned to today, so the result is identical across
+# requests and SPY's annualized stats move by well under a basis point in an
+# hour. The hardcoded fallback is never cached, so failures retry.
+_SPY_BENCH_CACHE = None  # (monotonic timestamp, dict) or None
+_SPY_BENCH_TTL = 60 * 60  # seconds
+_SPY_BENCH_LOCK = threading.Lock()
+
 
 def compute_portfolio_metrics(
     weights: np.ndarray,
     mean_returns: np.ndarray,
     cov_matrix: np.ndarray,
+    cov_w: np.ndarray = None,
+    normalize: bool = True,
 ) -> dict:
     """
     Compute annualized return, volatility, and Sharpe ratio for a portfolio.
@@ -42,26 +123,51 @@ def compute_portfolio_metrics(
         weights:      Portfolio weight vector (will be renormalized if needed)
         mean_returns: Annualized expected return per stock (shape: n,)
         cov_matrix:   Annualized covariance matrix (shape: n x n)
+        cov_w:        Optional precomputed Σw for the *same* weights vector as
+                      passed — callers that already formed the matrix-vector
+                      product (e.g. inside an optimizer) can hand it in to
+                      skip recomputing it here
+        normalize:    Pass False when the weights are known to sum to 1
+                      already (optimizer output) to skip the renormalization
 
     Returns:
         Dict with keys: expected_return, volatility, sharpe_ratio
     """
-    weights = np.array(weights, dtype=float)
-
-    # Renormalize so weights always sum to 1 (handles binary QAOA output)
-    if weights.sum() > 0:
-        weights = weights / weights.sum()
-
-    # Portfolio expected return: E[R_p] = w^T μ  (linear combination of stock returns)
-    expected_return = float(np.dot(weights, mean_returns))
+    # asarray, not array: no copy when already a float64 ndarray (the usual
+    # case — weights come straight out of numpy-based optimizers)
+    weights = np.asarray(weights, dtype=np.float64)
+
+    # Renormalize so weights always sum to 1 (handles binary QAOA output).
+    # Σw is linear in w, so a supplied cov_w is rescaled by the same factor.
+    if normalize:
+        s = weights.sum()
+        if s > 0:
+            weights = weights / s
+            if cov_w is not None:
+                cov_w = cov_w / s
+
+    if _HAS_NUMBA and cov_w is None:
+        # Fused return + quadratic form + Sharpe in one JIT kernel
+        expected_return, volatility, sharpe = _portfolio_stats(
+            weights,
+            np.asarray(mean_returns, dtype=np.float64),
+            np.asarray(cov_matrix, dtype=np.float64),
+            RISK_FREE_RATE,
+        )
+    else:
+        # Portfolio expected return: E[R_p] = w^T μ  (linear combination of stock returns)
+        expected_return = float(np.dot(weights, mean_returns))
 
-    # Portfolio variance: σ²_p = w^T Σ w  (quadratic form capturing cross-correlations)
-    variance = float(weights @ cov_matrix @ weights)
-    volatility = float(np.sqrt(variance))  # standard deviation = annualized volatility
+        # Portfolio variance: σ²_p = w^T Σ w = w^T (Σw) — one matrix-vector
+        # product (reused when the caller supplied it) plus a dot product
+        if cov_w is None:
+            cov_w = cov_matrix @ weights
+        variance = float(weights @ cov_w)
+        volatility = float(np.sqrt(variance))  # standard deviation = annualized volatility
 
-    # Sharpe ratio: excess return per unit of risk
-    # Guard against division by zero (zero-variance degenerate portfolios)
-    sharpe = (expected_return - RISK_FREE_RATE) / volatility if volatility > 1e-9 else 0.0
+        # Sharpe ratio: excess return per unit of risk
+        # Guard against division by zero (zero-variance degenerate portfolios)
+        sharpe = (expected_return - RISK_FREE_RATE) / volatility if volatility > 1e-9 else 0.0
 
     return {
         "expected_return": round(expected_return, 6),
@@ -70,9 +176,14 @@ def compute_portfolio_metrics(
     }
 
 
+def _cum_pct(r: np.ndarray) -> np.ndarray:
+    """Cumulative % return of a daily return series, compounded in log space."""
+    return np.expm1(np.cumsum(np.log1p(r))) * 100.0
+
+
 def _fetch_spy_daily(start: datetime, end: datetime) -> pd.Series:
     """
-    Fetch SPY (S&P 500 ETF) daily returns for a given date range.
+    Fetch SPY (S&P 500 ETF) daily returns for a given date range, cache-first.
 
     SPY is used as the market benchmark. Returns empty Series on any failure
     so callers can gracefully substitute zeros or a hardcoded fallback.
@@ -84,43 +195,85 @@ def _fetch_spy_daily(start: datetime, end: datetime) -> pd.Series:
     Returns:
         pd.Series of daily percentage returns, or empty Series on failure
     """
+    key = (start.date(), end.date())
+    now = time.monotonic()
+    with _SPY_CACHE_LOCK:
+        cached = _SPY_CACHE.get(key)
+        if cached is not None and now - cached[0] < _SPY_CACHE_TTL:
+            return cached[1]
+
+    spy_daily = _download_spy_daily(start, end)
+
+    if not spy_daily.empty:
+        with _SPY_CACHE_LOCK:
+            _SPY_CACHE[key] = (now, spy_daily)
+
+    return spy_daily
+
+
+def _download_spy_daily(start: datetime, end: datetime) -> pd.Series:
+    """
+    SPY daily returns via the shared price cache — see _fetch_spy_daily for
+    the contract.
+
+    Goes through fetch_close_prices, so SPY closes land in the same parquet
+    disk cache as the portfolio tickers: a server restart (or a second
+    process) reuses the file instead of hitting the network, and the
+    day-granular cache key rolls over naturally when `end` advances.
+    """
     try:
-        raw = yf.download(
-            "SPY",
-            start=start.strftime("%Y-%m-%d"),
+        close = fetch_close_prices(
+            ["SPY"],
+            start.strftime("%Y-%m-%d"),
             # Fetch a few extra days to handle weekends and holidays at the boundary
-            end=(end + timedelta(days=5)).strftime("%Y-%m-%d"),
-            auto_adjust=True,
-            progress=False,
+            (end + timedelta(days=5)).strftime("%Y-%m-%d"),
         )
-        if raw.empty:
+        if close.empty:
             return pd.Series(dtype=float)
 
-        close = raw["Close"]
-        # Handle MultiIndex from yfinance 1.x — extract single column
-        if isinstance(close, pd.DataFrame):
-            close = close.iloc[:, 0]
-
-        return close.pct_change().dropna()
+        return close["SPY"].dropna().pct_change().dropna()
 
     except Exception:
         # Network failure, API rate limit, etc. — caller handles the empty case
         return pd.Series(dtype=float)
 
 
-def compute_spy_benchmark() -> dict:
+def fetch_spy_benchmark_series() -> pd.Series:
+    """
+    SPY daily returns over the standard 2-year window, cache-first.
+
+    Fetched once per request and shared by compute_spy_benchmark and
+    compute_backtest — the window covers the portfolio data range, so the
+    backtest never needs its own SPY download. Empty Series on failure.
+    """
+    end = datetime.today()
+    start = end - timedelta(days=2 * 365)
+    return _fetch_spy_daily(start, end)
+
+
+def compute_spy_benchmark(spy_daily: pd.Series = None) -> dict:
     """
     Compute annualized SPY metrics over the same 2-year window used for the portfolio.
 
     Falls back to hardcoded historical averages if the yfinance download fails
     (approximately: 10% annual return, 17% volatility).
 
+    Args:
+        spy_daily: Optional already-fetched SPY daily return series
+                   (from fetch_spy_benchmark_series); fetched here if None
+
     Returns:
         Dict with keys: ticker, expected_return, volatility, sharpe_ratio
     """
-    end = datetime.today()
-    start = end - timedelta(days=2 * 365)
-    spy_daily = _fetch_spy_daily(start, end)
+    global _SPY_BENCH_CACHE
+
+    now = time.monotonic()
+    with _SPY_BENCH_LOCK:
+        if _SPY_BENCH_CACHE is not None and now - _SPY_BENCH_CACHE[0] < _SPY_BENCH_TTL:
+            return dict(_SPY_BENCH_CACHE[1])
+
+    if spy_daily is None:
+        spy_daily = fetch_spy_benchmark_series()
 
     # Use hardcoded fallback if we couldn't get enough real data
     if spy_daily.empty or len(spy_daily) < 30:
@@ -136,18 +289,23 @@ def compute_spy_benchmark() -> dict:
     ann_vol = float(spy_daily.std() * np.sqrt(trading_days))  # √252 scaling for daily → annual vol
     sharpe = (ann_return - RISK_FREE_RATE) / ann_vol if ann_vol > 1e-9 else 0.0
 
-    return {
+    result = {
         "ticker": "SPY",
         "expected_return": round(ann_return, 6),
         "volatility": round(ann_vol, 6),
         "sharpe_ratio": round(sharpe, 6),
     }
+    with _SPY_BENCH_LOCK:
+        _SPY_BENCH_CACHE = (now, result)
+    return dict(result)
 
 
 def compute_backtest(
     qaoa_weights: np.ndarray,
     classical_weights: np.ndarray,
     daily_returns: pd.DataFrame,
+    spy_series: pd.Series = None,
+    normalize: bool = True,
 ) -> List[dict]:
     """
     Apply static portfolio weights to historical daily returns and compute
@@ -166,53 +324,87 @@ def compute_backtest(
         qaoa_weights:      Binary allocation from QAOA (renormalized to sum to 1)
         classical_weights: Continuous weights from Markowitz optimization
         daily_returns:     DataFrame of daily returns (index=date, columns=tickers)
+        spy_series:        Optional SPY daily return series covering the data
+                           window (the benchmark's series is reused by
+                           /optimize); fetched here if None
+        normalize:         Pass False when both weight vectors already sum
+                           to 1 to skip the renormalization and its copies
 
     Returns:
         List of ~100 evenly-spaced data points, each a dict:
         {"date": "YYYY-MM-DD", "qaoa": float, "classical": float, "spy": float}
         Values are cumulative % returns (e.g. 15.3 = +15.3% from start).
     """
-    qaoa_w = np.array(qaoa_weights, dtype=float)
-    classical_w = np.array(classical_weights, dtype=float)
+    qaoa_w = np.asarray(qaoa_weights, dtype=np.float64)
+    classical_w = np.asarray(classical_weights, dtype=np.float64)
 
-    # Normalize: QAOA returns binary {0,1} allocation, needs to sum to 1 for equal-weight
-    if qaoa_w.sum() > 0:
-        qaoa_w /= qaoa_w.sum()
-    if classical_w.sum() > 0:
-        classical_w /= classical_w.sum()
-
-    # Compute daily portfolio returns as weighted sum of individual stock returns
-    # Shape: daily_returns.values is (T x n), weights is (n,) → result is (T,)
-    qaoa_daily = daily_returns.values @ qaoa_w
-    classical_daily = daily_returns.values @ classical_w
-
-    # Cumulative return: compound the daily returns multiplicatively
-    # cumprod(1 + r_t) gives the growth factor; subtract 1 and multiply by 100 for percentage
-    qaoa_cum = (np.cumprod(1 + qaoa_daily) - 1) * 100
-    classical_cum = (np.cumprod(1 + classical_daily) - 1) * 100
+    # Normalize: QAOA returns binary {0,1} allocation, needs to sum to 1 for
+    # equal-weight. Out-of-place division — the inputs may be caller-owned.
+    if normalize:
+        if qaoa_w.sum() > 0:
+            qaoa_w = qaoa_w / qaoa_w.sum()
+        if classical_w.sum() > 0:
+            classical_w = classical_w / classical_w.sum()
 
     dates = daily_returns.index
 
-    # Fetch SPY for the same exact date range as the portfolio data
-    spy_daily = _fetch_spy_daily(dates[0].to_pydatetime(), dates[-1].to_pydatetime())
+    # Reuse the caller's SPY series when available; otherwise fetch the exact
+    # portfolio date range. The asof-join below tolerates a wider series.
+    spy_daily = spy_series
+    if spy_daily is None:
+        spy_daily = _fetch_spy_daily(dates[0].to_pydatetime(), dates[-1].to_pydatetime())
     if not spy_daily.empty:
-        # Align SPY dates with portfolio dates (forward-fill any gaps from market close differences)
-        spy_daily = spy_daily.reindex(dates, method="ffill").fillna(0)
-        spy_cum = (np.cumprod(1 + spy_daily.values) - 1) * 100
+        # Align SPY dates with portfolio dates: an asof-join on the sorted
+        # int64 nanosecond timestamps. searchsorted finds the last SPY
+        # observation at or before each portfolio date (the forward-fill),
+        # and dates earlier than SPY's first observation get 0 — same
+        # semantics as reindex(method="ffill").fillna(0), without building
+        # an intermediate Series and index hash table.
+        spy_idx_ns = spy_daily.index.values.view("i8")
+        dates_ns = dates.values.view("i8")
+        pos = np.searchsorted(spy_idx_ns, dates_ns, side="right") - 1
+        spy_vals = np.where(pos >= 0, spy_daily.values[np.maximum(pos, 0)], 0.0)
     else:
         # If SPY data is unavailable, show flat line at 0%
-        spy_cum = np.zeros(len(dates))
+        spy_vals = np.zeros(len(dates))
+
+    # to_numpy with an explicit dtype rather than .values: on nullable or
+    # mixed extension dtypes .values can yield an object array, silently
+    # demoting the matmul below to a Python loop. This pins the BLAS path
+    # (and is copy-free for the plain float frame data.py builds).
+    R = np.ascontiguousarray(daily_returns.to_numpy(dtype=np.float64, copy=False))
+
+    if _HAS_NUMBA:
+        # One fused pass: portfolio returns, compounding and % scaling together
+        qaoa_cum, classical_cum, spy_cum = _backtest_kernel(
+            R, qaoa_w, classical_w,
+            np.ascontiguousarray(spy_vals, dtype=np.float64),
+        )
+    else:
+        # Daily portfolio returns as weighted sums of individual stock
+        # returns. Both weight vectors are stacked into an (n, 2) matrix so
+        # one R @ W matmul streams the returns matrix — the largest array in
+        # this step — through cache once instead of twice. Then compound in
+        # log space — expm1(cumsum(log1p(r))) equals cumprod(1 + r) - 1 but
+        # uses the fused log1p/expm1 intrinsics, allocates fewer temporaries,
+        # and rounds better over long compounding series.
+        daily = R @ np.column_stack((qaoa_w, classical_w))
+        qaoa_cum = _cum_pct(daily[:, 0])
+        classical_cum = _cum_pct(daily[:, 1])
+        spy_cum = _cum_pct(spy_vals)
 
     # Downsample to ~100 points for readable chart rendering
     # (500 daily points would overload the chart tooltip and look noisy)
     step = max(1, len(dates) // 100)
-    result = []
-    for i in range(0, len(dates), step):
-        result.append({
-            "date": dates[i].strftime("%Y-%m-%d"),
-            "qaoa": round(float(qaoa_cum[i]), 2),
-            "classical": round(float(classical_cum[i]), 2),
-            "spy": round(float(spy_cum[i]), 2),
-        })
-
-    return result
+    idx = np.arange(0, len(dates), step)
+    # Format all dates in one vectorized strftime call rather than one
+    # Timestamp.strftime per chart point
+    date_strs = dates[idx].strftime("%Y-%m-%d").tolist()
+    qaoa_pts = np.round(qaoa_cum[idx], 2).tolist()
+    classical_pts = np.round(classical_cum[idx], 2).tolist()
+    spy_pts = np.round(spy_cum[idx], 2).tolist()
+
+    return [
+        {"date": d, "qaoa": q, "classical": c, "spy": s}
+        for d, q, c, s in zip(date_strs, qaoa_pts, classical_pts, spy_pts)
+    ]
@@ -1,8 +1,15 @@
+import re
+
 from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import List, Optional
 
 MAX_TICKERS = 50
 
+# Plausible Yahoo ticker: 1-6 chars of A-Z/0-9 plus the class/share
+# separators ("BRK.B", "BF-B"). Compiled once — the validator runs on every
+# /optimize call and every debounced /validate-tickers keystroke.
+_TICKER_RE = re.compile(r"^[A-Z0-9.\-]{1,6}$")
+
 
 class PortfolioRequest(BaseModel):
     tickers: List[str] = Field(..., description=f"List of stock tickers (2–{MAX_TICKERS})")
@@ -15,7 +22,15 @@ class PortfolioRequest(BaseModel):
     @field_validator("tickers")
     @classmethod
     def normalize_tickers(cls, v: List[str]) -> List[str]:
-        cleaned = list(dict.fromkeys(t.strip().upper() for t in v if t.strip()))
+        # One pass per ticker: normalize, screen against the ticker pattern
+        # (rejecting junk before it costs a Yahoo round trip), and dedupe
+        seen = set()
+        cleaned = []
+        for t in v:
+            t = t.strip().upper()
+            if t and t not in seen and _TICKER_RE.match(t):
+                seen.add(t)
+                cleaned.append(t)
         if len(cleaned) < 2:
             raise ValueError("At least 2 valid tickers are required")
         if len(cleaned) > MAX_TICKERS:
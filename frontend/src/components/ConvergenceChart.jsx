@@ -37,7 +37,7 @@ export default function ConvergenceChart({ convergence }) {
         <div>
           <h3 className="text-sm font-medium text-primary">QAOA Optimization Convergence</h3>
           <p className="text-[11px] text-subtle mt-0.5">
-            COBYLA cost function · {convergence.length} iterations
+            SPSA cost function · {convergence.length} iterations
             {improvement && ` · ${improvement}% improvement`}
           </p>
         </div>
@@ -213,7 +213,7 @@ q₃: ─H──ZZ─Rz──Rx──ZZ─Rz──Rx──M─
       </Section>
 
       {/* 5 */}
-      <Section title="5 — Variational Optimization: COBYLA Drives the Quantum Loop">
+      <Section title="5 — Variational Optimization: SPSA Drives the Quantum Loop">
         <div className="pt-4 space-y-3 text-sm text-secondary leading-relaxed">
           <p>
             QAOA is a <strong className="text-primary">variational algorithm</strong>. The quantum circuit is parameterized; a classical optimizer finds the best parameters by minimizing the expected cost:
@@ -229,7 +229,7 @@ computing the empirical average of the Hamiltonian on each bitstring.`}
           <div className="bg-surface border border-border rounded-lg p-4 my-3">
             <div className="flex items-center justify-between text-[11px] font-mono">
               <div className="text-center space-y-1">
-                <div className="border border-border rounded px-2 py-1.5 text-secondary">COBYLA</div>
+                <div className="border border-border rounded px-2 py-1.5 text-secondary">SPSA</div>
                 <div className="text-muted">classical optimizer</div>
               </div>
               <div className="flex-1 flex flex-col items-center gap-1 px-3">
@@ -250,10 +250,10 @@ computing the empirical average of the Hamiltonian on each bitstring.`}
           </div>
 
           <p>
-            <strong className="text-primary">COBYLA</strong> (Constrained Optimization BY Linear Approximation) is chosen because it is <em>derivative-free</em> — ideal for quantum circuits where gradients are expensive to compute. It only needs function evaluations, not gradients.
+            <strong className="text-primary">SPSA</strong> (Simultaneous Perturbation Stochastic Approximation) is chosen because it is <em>derivative-free</em> and noise-tolerant — ideal for quantum circuits where gradients are expensive to compute. It estimates the gradient from just two cost evaluations per step, however many parameters the circuit has.
           </p>
           <p>
-            Each iteration: COBYLA proposes new (γ,β) → the circuit runs for <Code>inner_shots</Code> → measurement counts estimate ⟨H_C⟩ → COBYLA updates. The convergence chart shows this cost decreasing iteration by iteration.
+            Each iteration: SPSA probes two perturbed (γ,β) settings → the circuits run for <Code>inner_shots</Code> → measurement counts estimate ⟨H_C⟩ at both → SPSA updates. The convergence chart shows this cost decreasing iteration by iteration.
           </p>
           <p className="text-xs text-muted border-l border-border pl-3">
             After convergence, a final <Code>1024-shot</Code> sample is taken with the optimal parameters. Each shot collapses the superposition to a single bitstring — one candidate portfolio.
@@ -346,11 +346,11 @@ Bitstring  |  Count  |  Portfolio
               ["Ising mapper", "qubo.to_ising()"],
               ["Simulator", "AerSimulator (QASM / statevector)"],
               ["IBM hardware", "SamplerV2 via qiskit-ibm-runtime"],
-              ["Classical optimizer", "COBYLA (scipy)"],
+              ["Classical optimizer", "SPSA"],
               ["Layers (p)", "2"],
               ["Final shots", "1024"],
               ["Inner shots", "Adaptive (128–1024)"],
-              ["Max COBYLA iterations", "Adaptive (50–200)"],
+              ["Max SPSA iterations", "Adaptive (50–200)"],
               ["Hardware qubit limit", "≤5 stocks"],
             ].map(([k, v]) => (
               <div key={k} className="flex justify-between border-b border-border py-1.5">